@@ -15,12 +15,64 @@
 
 import pandas as pd
 import os
+import math
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import matplotlib.pyplot as plt
 
+# Gravity acceleration (9.81 m/s^-2) over the gas constant for dry air
+# (287.05 J Kg^-1 K^-1), used for the barometric pressure height adjustment
+_G_OVER_RA = 9.81 / 287.05
+
+# Ship met sensor columns. These only carry a few significant digits, so
+# they are downcast to float32; position and navigation columns keep float64
+SHIP_FLOAT32_COLUMNS = [
+    "WXTS_Ta", "WXTP_Ta", "WXTS_Pa", "WXTP_Pa", "BAROM_P", "BAROM_S",
+    "WXTS_Ri", "WXTP_Ri", "WXTS_Rc", "WXTP_Rc", "WXTS_Dm", "WXTP_Dm",
+    "WXTS_Sm", "WXTP_Sm", "WXTS_TS", "WXTP_TS", "WXTS_TD", "WXTP_TD",
+    "WXTS_Ua", "WXTP_Ua", "RAD_SW", "RAD_LW", "SBE45S", "SBE48T",
+    "PAR", "FLR"]
+
+# Twinned ship sensors averaged into a single metbk field
+SHIP_PAIRS = {
+    "atmp": ("WXTS_Ta", "WXTP_Ta"), # air temperature
+    "bpr": ("WXTP_Pa", "WXTS_Pa"), # barometric pressure
+    "prc": ("WXTP_Ri", "WXTS_Ri"), # rain intensity
+    "wspd": ("WXTS_TS", "WXTP_TS"), # true wind speed
+    "wdir": ("WXTS_TD", "WXTP_TD"), # true wind direction
+    "rhr": ("WXTP_Ua", "WXTS_Ua"), # relative humidity
+}
+
+# Single ship fields renamed to match the metbk
+SHIP_RENAME = {
+    "RAD_SW": "swr", "RAD_LW": "lwr", # shortwave and longwave radiation
+    "SBE45S": "sal", "SBE48T": "sst", "PAR": "par", "FLR": "flr", # surface water
+    "Dec_LON": "lon", "Dec_LAT": "lat", "SPD": "spd", "SOG": "sog",
+    "COG": "cog", "HDT": "hdt", # ship data
+}
+
+# Ship fields which are not carried over: the date and time (replaced by a
+# datetime), the "corrected" pressure, the rain accumulation, the relative
+# wind directions and speed (in favor of true wind direction and speed) and
+# the remaining ship data
+SHIP_DROP = ["DATE_GMT", "TIME_GMT", "BAROM_P", "BAROM_S", "WXTP_Rc", "WXTS_Rc",
+             "WXTP_Dm", "WXTS_Dm", "WXTP_Sm", "WXTS_Sm", "SSVdslog", "FLOW",
+             "Depth12", "Depth35", "EM122"]
+
 
 # +
-def md2vect(wspd, wdir):
+def _float_dtype(*arrays):
+    """Floating point type to compute in: float32 (or float16) inputs stay in
+    single precision and anything else (integers, objects, strings) uses
+    float64."""
+    if all(a.dtype in (np.float32, np.float16) for a in arrays):
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+
+def md2vect(wspd, wdir, vx=None, vy=None, dtype=None):
     """Calculate north and east wind vectors from magnitude and direction
 
     Parameters
@@ -28,7 +80,14 @@ def md2vect(wspd, wdir):
     wspd: array-like
         Absolute wind speeds (m/s)
     wdir: array-like
-        Wind directions (degrees). Values will be wrapped into [0, 360).
+        Wind directions (degrees). Any value is accepted; angles outside
+        [0, 360) give the same vectors as their wrapped equivalents.
+    vx, vy: numpy.ndarray, optional
+        Preallocated output buffers to reuse across calls (wspd itself may
+        be passed to convert in place)
+    dtype: numpy dtype, optional
+        Floating point type to compute in. By default float32 inputs stay
+        in single precision and anything else is computed in float64.
 
     Returns
     -------
@@ -38,23 +97,45 @@ def md2vect(wspd, wdir):
         Easterly wind component (same shape as wspd)
     """
     # Ensure NumPy arrays (avoid pandas SettingWithCopyWarning)
-    wspd = np.asarray(wspd, dtype=float)
-    wdir = np.asarray(wdir, dtype=float)
-
-    # Wrap angles into [0, 360)
-    wdir = np.mod(wdir, 360.0)
-
-    # Convert to radians
-    wdir_rad = np.deg2rad(wdir)
-
-    # Calculate northerly and easterly wind vectors
-    vx = wspd * np.sin(wdir_rad)  # north component
-    vy = wspd * np.cos(wdir_rad)  # east component
+    wspd = np.asarray(wspd)
+    wdir = np.asarray(wdir)
+    if dtype is None:
+        dtype = _float_dtype(wspd, wdir)
+    wspd = np.asarray(wspd, dtype=dtype)
+    wdir = np.asarray(wdir, dtype=dtype)
+
+    # Convert to radians (no wrapping into [0, 360) needed: sin and cos
+    # are periodic)
+    wdir_rad = wdir * (np.pi / 180.0)
+
+    # The speeds are read after the output buffers are written, so work from
+    # a copy if the caller passed the speed array back in as a buffer
+    if any(buf is not None and np.may_share_memory(buf, wspd) for buf in (vx, vy)):
+        wspd = wspd.copy()
+
+    # Calculate northerly and easterly wind vectors in the output buffers
+    shape = np.broadcast_shapes(wspd.shape, wdir.shape)
+    new_vx, new_vy = vx is None, vy is None
+    if new_vx:
+        vx = np.empty(shape, dtype=dtype)
+    if new_vy:
+        vy = np.empty(shape, dtype=dtype)
+    np.sin(wdir_rad, out=vx)
+    vx *= wspd  # north component
+    np.cos(wdir_rad, out=vy)
+    vy *= wspd  # east component
+
+    # Scalar inputs give NumPy scalars back rather than 0-d arrays
+    if shape == ():
+        if new_vx:
+            vx = vx[()]
+        if new_vy:
+            vy = vy[()]
 
     return vx, vy
 
 
-def vect2md(vx, vy):
+def vect2md(vx, vy, wspd=None, wdir=None, dtype=None):
     """Calculate the wind speed and direction from north and east wind vectors.
 
     Parameters
@@ -63,6 +144,12 @@ def vect2md(vx, vy):
         Northerly wind component
     vy: array-like
         Easterly wind component
+    wspd, wdir: numpy.ndarray, optional
+        Preallocated output buffers to reuse across calls (vx and vy
+        themselves may be passed to convert in place)
+    dtype: numpy dtype, optional
+        Floating point type to compute in. By default float32 inputs stay
+        in single precision and anything else is computed in float64.
 
     Returns
     -------
@@ -73,29 +160,93 @@ def vect2md(vx, vy):
         (direction the vector points TOWARD, clockwise from north)
     """
     # Ensure NumPy arrays
-    vx = np.asarray(vx, dtype=float)
-    vy = np.asarray(vy, dtype=float)
-
-    # Speed
-    wspd = np.sqrt(vx**2 + vy**2)
-
-    # Direction in degrees, range [-180, 180]
-    wdir = np.degrees(np.arctan2(vx, vy))
-
-    # Wrap into [0, 360)
-    wdir = np.mod(wdir, 360.0)
+    vx = np.asarray(vx)
+    vy = np.asarray(vy)
+    if dtype is None:
+        dtype = _float_dtype(vx, vy)
+    vx = np.asarray(vx, dtype=dtype)
+    vy = np.asarray(vy, dtype=dtype)
+
+    # The components are read again after the output buffers are written, so
+    # work from copies if the caller passed either one back in as a buffer
+    if any(buf is not None and np.may_share_memory(buf, v)
+           for buf in (wspd, wdir) for v in (vx, vy)):
+        vx, vy = vx.copy(), vy.copy()
+
+    shape = np.broadcast_shapes(vx.shape, vy.shape)
+    new_wspd, new_wdir = wspd is None, wdir is None
+    if new_wspd:
+        wspd = np.empty(shape, dtype=dtype)
+    if new_wdir:
+        wdir = np.empty(shape, dtype=dtype)
+
+    # Speed, accumulated in the output buffer
+    np.multiply(vx, vx, out=wspd)
+    wspd += vy*vy
+    np.sqrt(wspd, out=wspd)
+
+    # Direction in degrees, range [-180, 180]. Later steps work in place
+    # on this buffer so no further temporaries are allocated
+    np.arctan2(vx, vy, out=wdir)
+    np.degrees(wdir, out=wdir)
+
+    # Wrap into [0, 360). Only negative angles need shifting, so a
+    # compare and add is enough (no fmod). Adding +0.0 turns the -0.0 that
+    # arctan2(-0.0, y > 0) returns into 0.0, as np.mod did
+    np.add(wdir, 360.0, out=wdir, where=wdir < 0)
+    wdir += 0.0
+
+    # Scalar inputs give NumPy scalars back rather than 0-d arrays
+    if shape == ():
+        if new_wspd:
+            wspd = wspd[()]
+        if new_wdir:
+            wdir = wdir[()]
 
     return wspd, wdir
 
 
-def bpr_adjust(bpr,atmp,zbpr,znew):
-    # constants
-    g = 9.81 # gravity acceleration in m/s^-2
-    Ra = 287.05 # gas constant for dry air in J Kg^-1 K^-1
+def bpr_adjust(bpr, atmp, zbpr, znew, out=None):
+    """Adjust barometric pressure from the sensor height to a new height.
 
-    # barometric pressure
-    atmp=atmp+273.15 # air temperature in K
-    bprnew=bpr*np.exp(-g*(znew-zbpr)/(Ra*atmp));
+    Parameters
+    ----------
+    bpr: (float or array-like)
+        barometric pressure in mbars measured at height zbpr
+    atmp: (float or array-like)
+        air temperature in deg_C
+    zbpr: (float)
+        height of the barometric pressure sensor in m
+    znew: (float)
+        height to adjust the pressure to in m
+    out: (numpy.ndarray, optional)
+        array to write the result into; pass bpr itself to adjust in place
+
+    Return
+    ------
+    bprnew: (float or numpy.ndarray)
+        barometric pressure in mbars at height znew
+    """
+    # Plain float inputs use math.exp to skip NumPy ufunc dispatch
+    if out is None and isinstance(bpr, float) and isinstance(atmp, float):
+        return np.float64(bpr*math.exp(-_G_OVER_RA*(znew-zbpr)/(atmp+273.15)))
+
+    # Build the exponent in a single buffer rather than one temporary per
+    # step, when both inputs are arrays and the heights fit in that buffer
+    if type(bpr) is np.ndarray and type(atmp) is np.ndarray and atmp.ndim > 0:
+        dz = np.subtract(znew, zbpr)
+        if np.broadcast_shapes(atmp.shape, dz.shape) == atmp.shape:
+            expo = atmp + 273.15 # air temperature in K
+            np.divide(-_G_OVER_RA*dz, expo, out=expo)
+            np.exp(expo, out=expo)
+            return np.multiply(bpr, expo, out=out)
+
+    # Scalars and pandas objects use the plain expression, which is cheapest
+    # for scalars and keeps Series aligned on their index
+    bprnew = bpr*np.exp(-_G_OVER_RA*(znew-zbpr)/(atmp+273.15))
+    if out is not None:
+        out[...] = bprnew
+        bprnew = out
 
     return bprnew
 
@@ -121,24 +272,45 @@ def rh2q(atmp, bpr, hrh, sflag=0):
         Specific humidity in g/kg
     """
 
-    # Calculate saturated vapor pressure es in mb, using Buck
-    es=6.1121*np.exp(17.502*atmp/(atmp+240.97))*(1.0007+3.46E-6*bpr)
+    # Scalar inputs use math.exp to skip NumPy ufunc dispatch
+    scalar = np.isscalar(atmp) and np.isscalar(bpr) and np.isscalar(hrh)
+    exp = math.exp if scalar else np.exp
 
-    # Saturated pressure is 2% less due to slat right at the sea interface
-    es=(1.0-0.02*sflag)*es;
+    # Calculate saturated vapor pressure es in mb, using Buck. Saturated
+    # pressure is 2% less due to salt right at the sea interface, which is
+    # folded into the leading constant
+    es=6.1121*(1.0-0.02*sflag)*exp(17.502*atmp/(atmp+240.97))*(1.0007+3.46E-6*bpr)
 
-    # Second, by def of relative hymidity, vapor pressure is:
-    e=es*hrh/100 # Where HRH is in %RH
+    # Second, by def of relative humidity, vapor pressure is:
     if sflag==1:
         e = es
+    else:
+        e=es*hrh/100 # Where HRH is in %RH
+
+    # Compute specific humidity, scaled from kg/kg to g/kg
+    q=(621.97*e)/(bpr-0.378*e); # q in g/kg
 
-    # Compute specific humidity
-    q=(0.62197*e)/(bpr-0.378*e); # q in kg/kg
-    q = q*1000; # q in g/kg
+    # Hand scalars back as NumPy scalars, as the np.exp path does
+    if scalar:
+        q = np.float64(q)
 
     return q
 
 
+def _pair_mean(a, b):
+    """Average two twinned sensor records, using whichever one is valid where
+    the other is NaN (the same result as df[[a, b]].mean(axis=1))."""
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+
+    mean = np.add(a, b)
+    mean *= 0.5
+    np.copyto(mean, b, where=np.isnan(a))
+    np.copyto(mean, a, where=np.isnan(b))
+
+    return mean
+
+
 # -
 
 class Ship():
@@ -170,13 +342,11 @@ class Ship():
             A list of all the ship met files which fall between the two time periods (inclusive)
         """
 
-        # ID desired ship files
-        ship_files = []
-        for file in os.listdir(filepath):
-            if file.endswith(".csv"):
-                file_date = pd.to_datetime(file[2:8], format="%y%m%d")
-                if (file_date >= T1) & (file_date <= T2):
-                    ship_files.append(f"{filepath}/{file}")
+        # ID desired ship files, parsing all of the file dates in one call
+        files = [file for file in os.listdir(filepath) if file.endswith(".csv")]
+        file_dates = pd.to_datetime([file[2:8] for file in files], format="%y%m%d")
+        in_range = (file_dates >= T1) & (file_dates <= T2)
+        ship_files = [f"{filepath}/{file}" for file, keep in zip(files, in_range) if keep]
         return ship_files
 
 
@@ -194,22 +364,31 @@ class Ship():
         data: (pandas.DataFrame)
             A dataframe with the parsed ship met data
         """
-        data = pd.DataFrame()
-        file_df_list = []
-        for file in filepaths:
-            df = pd.read_csv(file, header=1)
-            file_df_list.append(df)
-            #data = data.append(pd.read_csv(file, header=1), ignore_index=True)
+        # The C parser releases the GIL, so read the files in parallel threads
+        # (map keeps the results in the same order as filepaths)
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            file_df_list = list(executor.map(self._read_file, filepaths))
         data = pd.concat(file_df_list)
-        data.rename(columns=lambda x: x.strip(), inplace=True)
-        print(data)
-
-        for col in data.columns:
-            #print(col)
-            data.rename(columns={col: col.strip()}, inplace=True)
 
         return data
-        print(data)
+
+
+    def _read_file(self, filepath):
+        """Read a single ship met data file into a pandas DataFrame."""
+        df = pd.read_csv(filepath, header=1, skipinitialspace=True,
+                         na_values=[' NAN', 'NAN', 'NaN'])
+
+        # Strip whitespace from the column names with a single Index rebuild
+        df.columns = df.columns.str.strip()
+
+        # Downcast the met sensor columns to float32, coercing any other junk
+        # tokens to NaN
+        float32_columns = df.columns.intersection(SHIP_FLOAT32_COLUMNS)
+        df[float32_columns] = (df[float32_columns]
+                               .apply(pd.to_numeric, errors='coerce')
+                               .astype(np.float32))
+
+        return df
 
 
     def parse_headers(self, filepath):
@@ -279,106 +458,62 @@ class Ship():
             added to the attributes of each column.
         """
 
+        # Look up the columns once and skip attributes for missing ones
+        columns = set(data.columns)
         for item in attributes:
             name, desc, units = item.get("header"), item.get("desc"), item.get("units")
-            try:
+            if name in columns:
                 data[name].attrs = {
                     "description": desc,
                     "units" : units,
                 }
-            except:
-                pass
 
         return data
 
 
-    def process_data(self, df):
+    def process_data(self, df, debug=False):
         """
         Process the ship met data to get a single value from twinned sensors
-        and rename the fields to match the metbk
+        and rename the fields to match the metbk. Set debug=True to print the
+        intermediate frames and save the preprocessed data to
+        ./metbk_ship_parsed_data_preprocessed.csv
         """
 
-        #Remove leading and trailing white space from cell values
-        #Reformat NAN strings to actual NaNs
-        #Drop any NaNs from the data
-        #df['WXTS_Ta'] = df['WXTS_Ta'].apply(lambda x: x.strip())
-
-        print(df)
-        df = df.replace(' NAN', 'NaN')
-        df = df.replace('NAN', 'NaN')
-        df = df.replace('NaN', np.nan)
-        #df = df.dropna()
-        print(df)
-        df.to_csv('./metbk_ship_parsed_data_preprocessed.csv')
-
-        #make a list of all object column names in df
-        object_columns_list = list(df.select_dtypes(include=['object']).columns)
-        print('OBJECT COLS LIST RESULTS')
-        print(object_columns_list)
-        #remove the date and time column names from this list, remove function only takes one arg at a time...?
-        object_columns_list.remove('TIME_GMT')
-        object_columns_list.remove('DATE_GMT')
-        #make all remaining columns in the list to_numeric
-        #df[object_columns_list] = pd.to_numeric(df[object_columns_list])
-        df[object_columns_list] = df[object_columns_list].apply(pd.to_numeric, errors='coerce')
-
-        # Generate a datetime column
-        df["datetime"] = pd.to_datetime(df["DATE_GMT"] + " " + df["TIME_GMT"])
-        df = df.drop(columns=["DATE_GMT", "TIME_GMT"])
-
-        #df["WXTS_Ta"] = pd.to_numeric(df['WXTS_Ta'])
-        print(df.dtypes)
-        # Calculate an air temperature
-        df["atmp"] = df[["WXTS_Ta", "WXTP_Ta"]].mean(axis=1)
-        df = df.drop(columns=["WXTS_Ta", "WXTP_Ta"])
-
-        # Calculate a barometric pressure & drop the "corrected" pressure
-        #df["WXTS_Pa"] = pd.to_numeric(df['WXTS_Pa'])
-        df["bpr"] = df[["WXTP_Pa", "WXTS_Pa"]].mean(axis=1)
-        df = df.drop(columns=["WXTP_Pa", "WXTS_Pa", "BAROM_P", "BAROM_S"])
-
-        # Rain intensity
-        df["prc"] = df[["WXTP_Ri", "WXTS_Ri"]].mean(axis=1)
-        df = df.drop(columns=["WXTP_Ri", "WXTS_Ri", "WXTP_Rc", "WXTS_Rc"])
-
-        # Drop relative wind directions and speed in favor of true wind direction and speed
-        df = df.drop(columns=["WXTP_Dm", "WXTS_Dm", "WXTP_Sm", "WXTS_Sm"])
-        df["wspd"] = df[["WXTS_TS", "WXTP_TS"]].mean(axis=1)
-        df["wdir"] = df[["WXTS_TD", "WXTP_TD"]].mean(axis=1)
-        df = df.drop(columns=["WXTS_TS", "WXTP_TS", "WXTS_TD", "WXTP_TD"])
-
-        # Relative humidity
-        df["rhr"] = df[["WXTP_Ua", "WXTS_Ua"]].mean(axis=1)
-        df = df.drop(columns=["WXTP_Ua", "WXTS_Ua"])
-
-        # Shortwave radiation
-        df["swr"] = df["RAD_SW"]
-        df = df.drop(columns=["RAD_SW"])
-
-        # Longwave radiation
-        df["lwr"] = df["RAD_LW"]
-        df = df.drop(columns=["RAD_LW"])
-
-        # Surface water measurements
-        df["sal"] = df["SBE45S"]
-        df["sst"] = df["SBE48T"]
-        df["par"] = df["PAR"]
-        df["flr"] = df["FLR"]
-        df = df.drop(columns=["SBE45S", "SBE48T", "PAR", "FLR"])
-
-        # Ship DAta
-        df["lon"] = df["Dec_LON"]
-        df["lat"] = df["Dec_LAT"]
-        df["spd"] = df["SPD"]
-        df["sog"] = df["SOG"]
-        df["cog"] = df["COG"]
-        df["hdt"] = df["HDT"]
-
-        # Drop remaining columns
-        df = df.drop(columns=["Dec_LON", "Dec_LAT", "SPD", "SOG", "COG",
-                              "SSVdslog", "HDT", "FLOW", "Depth12", "Depth35", "EM122"])
-
-        print(df)
+        # NAN strings are already read in as NaNs by parse_data
+        if debug:
+            print(df)
+            df.to_csv('./metbk_ship_parsed_data_preprocessed.csv')
+
+        # Numeric columns are already parsed as floats, so only coerce the
+        # object columns left over (other than the date and time), if any
+        object_columns = df.select_dtypes(include=['object']).columns.difference(
+            ['DATE_GMT', 'TIME_GMT'])
+        if debug:
+            print('OBJECT COLS LIST RESULTS')
+            print(list(object_columns))
+        # (assign builds a new frame, leaving the caller's df untouched)
+        if len(object_columns) > 0:
+            df = df.assign(**{col: pd.to_numeric(df[col], errors='coerce')
+                              for col in object_columns})
+
+        # Generate a datetime column. The year-first dates and HH:MM:SS[.f]
+        # times parse on the ISO8601 fast path without format inference
+        datetime = pd.to_datetime(df["DATE_GMT"] + " " + df["TIME_GMT"], format="ISO8601")
+
+        if debug:
+            print(df.dtypes)
+
+        # Average the twinned sensors, then rename the single sensor fields
+        # and drop all of the source columns in one pass
+        df = df.assign(
+            datetime=datetime,
+            **{name: _pair_mean(df[a], df[b]) for name, (a, b) in SHIP_PAIRS.items()},
+        )
+        paired = [col for pair in SHIP_PAIRS.values() for col in pair]
+        df = df.rename(columns=SHIP_RENAME).drop(columns=paired + SHIP_DROP)
+
+        if debug:
+            print(df)
         return df
 
 
@@ -399,47 +534,19 @@ class Buoy():
         columns = ["date", "time", "bpr", "hrh", "atmp", "lwr", "prc", "sst",
                    "cond", "swr", "wnde", "wndn", "Vbatt1", "Vbatt2"]
 
-        metbk = pd.DataFrame()
-        file_df_list = []
-        for file in filepaths:
-            df = pd.read_csv(file, names=columns, delim_whitespace=True, on_bad_lines='skip')
-            file_df_list.append(df)
-
-            '''with open(file) as data:
-                for line in data.readlines():
-                    line = line.replace("\n","")
-                    line = [x for x in line.split(" ") if len(x) > 0]
-                    if len(line) != 14:
-                        continue
-                    metbk_line_dict = {
-                        "date": line[0],
-                        "time": line[1],
-                        "bpr": line[2],
-                        "hrh": line[3],
-                        "atmp": line[4],
-                        "lwr": line[5],
-                        "prc": line[6],
-                        "sst": line[7],
-                        "cond": line[8],
-                        "swr": line[9],
-                        "wnde": line[10],
-                        "wndn": line[11],
-                        "Vbatt1": line[12],
-                        "Vbatt2": line[13]}
-                        '''
-
-                    #file_df_line_list.append(metbk_line_dict)
-
-
-
-                #print(metbk_line_dict)
-
-                    #metbk = pd.DataFrame.from_dict(metbk_dict, orient='index').transpose()
-
-        metbk = pd.concat(file_df_list)
-
-        #print('METBK print result')
-        #print(metbk)
+        # The log files share one headerless layout, so copy them into a
+        # single temporary file and parse that once instead of per file
+        with tempfile.TemporaryFile() as merged:
+            for file in filepaths:
+                with open(file, "rb") as src:
+                    shutil.copyfileobj(src, merged)
+                # Make sure the next file starts on a new line
+                if merged.tell() > 0:
+                    merged.seek(-1, os.SEEK_CUR)
+                    if merged.read(1) != b"\n":
+                        merged.write(b"\n")
+            merged.seek(0)
+            metbk = pd.read_csv(merged, names=columns, sep=r"\s+", on_bad_lines='skip')
 
         return metbk
 
@@ -462,11 +569,10 @@ class Buoy():
             A list of all the metbk files which fall between the two time periods (inclusive)
         """
 
-        metbk_files = []
-        for file in os.listdir(filepath):
-            if file.endswith(".log"):
-                file_date = pd.to_datetime(file[2:8], format="%y%m%d")
-                if (file_date >= T1) & (file_date <= T2):
-                    metbk_files.append(f"{filepath}/{file}")
+        # Parse all of the file dates in one call
+        files = [file for file in os.listdir(filepath) if file.endswith(".log")]
+        file_dates = pd.to_datetime([file[2:8] for file in files], format="%y%m%d")
+        in_range = (file_dates >= T1) & (file_dates <= T2)
+        metbk_files = [f"{filepath}/{file}" for file, keep in zip(files, in_range) if keep]
 
         return metbk_files